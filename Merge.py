@@ -1,35 +1,44 @@
 import os
+import glob
 import json
+from concurrent.futures import ThreadPoolExecutor
 
-def build_json_from_txt(folder_path):
-    result = {}
+try:
+    import orjson  # Rust-backed encoder, much faster on large mappings
+except ImportError:
+    orjson = None
+
+def _read_one(path):
+    # Extract key name
+    key = os.path.basename(path)[len("datafields_"):-len(".txt")]
 
-    for filename in os.listdir(folder_path):
-        if filename.startswith("datafields_") and filename.endswith(".txt"):
-            # Extract key name
-            key = filename.replace("datafields_", "").replace(".txt", "")
+    # Read lines and remove duplicates while preserving order
+    with open(path, "r", encoding="utf-8") as f:
+        lines = list(dict.fromkeys(s for s in (line.strip() for line in f) if s))
 
-            # Read lines and remove duplicates while preserving order
-            seen = set()
-            lines = []
-            with open(os.path.join(folder_path, filename), "r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if line and line not in seen:
-                        seen.add(line)
-                        lines.append(line)
+    return key, lines
 
-            result[key] = lines
+def build_json_from_txt(folder_path):
+    # Escape the folder so brackets etc. in its name aren't read as a pattern;
+    # the name check keeps the match case-sensitive on Windows too
+    paths = [p for p in glob.glob(os.path.join(glob.escape(folder_path), "datafields_*.txt"))
+             if os.path.basename(p).startswith("datafields_") and p.endswith(".txt")]
 
-    return result
+    # Files are independent and reads release the GIL, so overlap the I/O with threads
+    with ThreadPoolExecutor(max_workers=min(32, len(paths) or 1)) as ex:
+        return dict(ex.map(_read_one, paths))
 
 
 if __name__ == "__main__":
     folder = "./your_folder_path"  # change to your folder path
     data_json = build_json_from_txt(folder)
 
-    # Save JSON
-    with open("output.json", "w", encoding="utf-8") as out:
-        json.dump(data_json, out, indent=4, ensure_ascii=False)
+    # Save JSON (orjson only supports 2-space indentation)
+    if orjson is not None:
+        with open("output.json", "wb") as out:
+            out.write(orjson.dumps(data_json, option=orjson.OPT_INDENT_2))
+    else:
+        with open("output.json", "w", encoding="utf-8") as out:
+            json.dump(data_json, out, indent=4, ensure_ascii=False)
 
     print("✅ JSON created successfully: output.json")
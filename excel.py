@@ -1,39 +1,37 @@
 import pandas as pd
 import json
-import re
 
 def count_level(s: str) -> int:
     """Count indentation level from '>' symbols."""
-    if not s or not str(s).strip():
+    if not s:
         return 0
-    m = re.match(r'^\s*(>+)', str(s))
-    return len(m.group(1)) if m else 0
+    t = str(s).lstrip()
+    return len(t) - len(t.lstrip('>'))
 
 def clean_name(s: str) -> str:
     """Remove > and namespace prefixes like abc:xyz → xyz, lowercase."""
     if not s:
         return ""
     s = str(s).strip()
-    s = re.sub(r'^\s*>+\s*', '', s)   # remove leading >
-    if ':' in s:
-        s = s.split(':')[-1]
-    return s.strip().lower()
+    if s[:1] == '>':
+        s = s.lstrip('>').lstrip()   # remove leading >
+    return s[s.rfind(':') + 1:].strip().lower()
 
-def parse_block(rows, start_idx, base_level):
+def parse_block(rows, levels, start_idx, base_level):
     """Recursively parse children."""
     items = []
     i = start_idx
     while i < len(rows):
         raw_elem, raw_type = rows[i]
-        lvl = count_level(raw_elem)
+        lvl = levels[i]
         if lvl <= base_level:
             break
 
         name = clean_name(raw_elem)
 
         # if child has children
-        if i + 1 < len(rows) and count_level(rows[i+1][0]) > lvl:
-            children, new_i = parse_block(rows, i+1, lvl)
+        if i + 1 < len(rows) and levels[i+1] > lvl:
+            children, new_i = parse_block(rows, levels, i+1, lvl)
             items.append({name: children})
             i = new_i
         else:
@@ -44,6 +42,7 @@ def parse_block(rows, start_idx, base_level):
 def parse_rows(rows):
     """Convert rows into nested JSON-like structure with type handling."""
     mapping = {}
+    levels = [count_level(r[0]) for r in rows]
     i = 0
     while i < len(rows):
         raw_elem, raw_type = rows[i]
@@ -51,7 +50,7 @@ def parse_rows(rows):
             i += 1
             continue
 
-        if count_level(raw_elem) != 0:
+        if levels[i] != 0:
             i += 1
             continue
 
@@ -60,14 +59,14 @@ def parse_rows(rows):
 
         # check next row level
         if i + 1 < len(rows):
-            next_lvl = count_level(rows[i+1][0])
+            next_lvl = levels[i+1]
         else:
             next_lvl = -1
 
         if next_lvl > 0:
             # *** use TYPE column as key ***
             key = clean_name(raw_type) if raw_type.strip() else name
-            children, new_i = parse_block(rows, i+1, 0)
+            children, new_i = parse_block(rows, levels, i+1, 0)
             mapping[key] = children
             i = new_i
         else:
@@ -75,15 +74,25 @@ def parse_rows(rows):
             i += 1
     return mapping
 
-def process_excel(file_path):
-    df = pd.read_excel(
+def _read_sheet(file_path, engine):
+    return pd.read_excel(
         file_path,
         sheet_name="Message Response",
         skiprows=2,
         usecols=[1, 2],  # B=Response Element Name, C=Type
-        dtype=str
+        dtype=str,
+        engine=engine
     ).fillna("")
 
+def process_excel(file_path):
+    # calamine (python-calamine) is much faster than openpyxl; fall back if it is not installed
+    try:
+        df = _read_sheet(file_path, "calamine")
+    except (ImportError, ValueError):
+        # Let pandas pick the engine from the extension (xlrd for .xls);
+        # its openpyxl reader already opens workbooks read-only / data-only
+        df = _read_sheet(file_path, None)
+
     rows = list(zip(df.iloc[:,0], df.iloc[:,1]))
     return parse_rows(rows)
 
@@ -1,27 +1,64 @@
 import json
 import re
+from functools import lru_cache
 import pandas as pd
 from openpyxl import load_workbook
 from openpyxl.styles import Font, PatternFill
 
+try:
+    import xlsxwriter  # styles the header while writing, so the file is never reopened
+except ImportError:
+    xlsxwriter = None
+
+_GETTER_RE = re.compile(r'\b(?:get|is)([A-Za-z0-9_]+)\s*\(\)')
+_FIELD_RE = re.compile(r'(?:get|is)([A-Za-z0-9_]+)\s*\(\)', re.IGNORECASE)
+
 # ---------- Helper functions ----------
+@lru_cache(maxsize=None)
 def extract_key_from_path(path: str) -> str:
     """
     Extract the keyword inside getter/is methods from a full path.
     Example: abc.def.getHai12() -> hai12
     """
-    match = re.search(r'\b(?:get|is)([A-Za-z0-9_]+)\s*\(\)', path)
+    if '(' not in path:
+        return None
+    # common case: a single trailing call like abc.def.getHai12()
+    if path.endswith('()') and path.count('(') == 1:
+        method = path[:-2].rstrip()
+        method = method[method.rfind('.') + 1:]
+        if method.isascii() and method.isidentifier():
+            if method.startswith('get') and len(method) > 3:
+                return method[3:].lower()
+            if method.startswith('is') and len(method) > 2:
+                return method[2:].lower()
+            return None
+    match = _GETTER_RE.search(path)
     if match:
         return match.group(1).lower()  # case-insensitive
     return None
 
+@lru_cache(maxsize=None)
 def normalize_field(field: str) -> str:
     """
     Normalize fields by removing get/is and parentheses.
     Example: getCustomerName() -> customername
     """
     field = field.strip()
-    match = re.match(r'(?:get|is)([A-Za-z0-9_]+)\s*\(\)', field, re.IGNORECASE)
+    if '(' not in field:
+        return field.lower()
+    # common case: getXxx() / isXxx() with a plain identifier
+    if field.endswith('()'):
+        body = field[:-2].rstrip()
+        prefix = body[:3].lower()
+        if prefix == 'get':
+            core = body[3:]
+        elif prefix[:2] == 'is':
+            core = body[2:]
+        else:
+            core = ''
+        if core.isascii() and core.isidentifier():
+            return core.lower()
+    match = _FIELD_RE.match(field)
     if match:
         return match.group(1).lower()
     return field.lower()
@@ -37,60 +74,89 @@ with open("output.json", "r") as f:
 matched_rows = []
 unmatched_paths = []
 
+# Normalize each output key's fields once (first key wins on case-insensitive clashes)
+out_index = {}
+for out_key, out_fields in output_dict.items():
+    out_key_l = out_key.lower()
+    if out_key_l not in out_index:
+        out_index[out_key_l] = (out_key, tuple(dict.fromkeys(normalize_field(f) for f in out_fields)))
+
 for path, master_fields in master_dict.items():
     extracted_key = extract_key_from_path(path)
     if not extracted_key:
         continue
 
-    matched = False
-    for out_key, out_fields in output_dict.items():
-        if extracted_key.lower() == out_key.lower():
-            matched = True
-
-            master_fields_norm = [normalize_field(f) for f in master_fields]
-            out_fields_norm = [normalize_field(f) for f in out_fields]
-
-            matched_fields = list(set(master_fields_norm) & set(out_fields_norm))
-            unmatched_master = list(set(master_fields_norm) - set(out_fields_norm))
-            unmatched_output = list(set(out_fields_norm) - set(master_fields_norm))
-
-            matched_rows.append({
-                "path": path,
-                "matchedkey": out_key,
-                "matchedfields": ", ".join(matched_fields),
-                "matchedcount": len(matched_fields),
-                "unmatchedfields": ", ".join(unmatched_master + unmatched_output),
-                "unmatchedcount": len(unmatched_master) + len(unmatched_output),
-                "present_in_jar": ", ".join(unmatched_master),
-                "present_in_excelsheet": ", ".join(unmatched_output)
-            })
-            break
-
-    if not matched:
+    # extract_key_from_path already lowercases; master fields are only normalized on a hit
+    hit = out_index.get(extracted_key)
+    if hit is None:
         unmatched_paths.append({"unmatched_path": path})
+        continue
+
+    out_key, out_fields_norm = hit
+
+    # One pass over both field lists: 1 = jar only, 2 = excel sheet only, 3 = both.
+    # Each field is hashed once and the cells keep first-seen order.
+    state = dict.fromkeys((normalize_field(f) for f in master_fields), 1)
+    for f in out_fields_norm:
+        state[f] = state.get(f, 0) | 2
+
+    matched_fields = [f for f, b in state.items() if b == 3]
+    unmatched_master = [f for f, b in state.items() if b == 1]
+    unmatched_output = [f for f, b in state.items() if b == 2]
+
+    matched_rows.append({
+        "path": path,
+        "matchedkey": out_key,
+        "matchedfields": ", ".join(matched_fields),
+        "matchedcount": len(matched_fields),
+        "unmatchedfields": ", ".join(unmatched_master + unmatched_output),
+        "unmatchedcount": len(unmatched_master) + len(unmatched_output),
+        "present_in_jar": ", ".join(unmatched_master),
+        "present_in_excelsheet": ", ".join(unmatched_output)
+    })
 
 # ---------- Create Excel Report ----------
 output_file = "comparison_report.xlsx"
 
-with pd.ExcelWriter(output_file, engine="openpyxl") as writer:
-    df_matched = pd.DataFrame(matched_rows)
-    df_unmatched = pd.DataFrame(unmatched_paths)
-
-    df_matched.to_excel(writer, sheet_name="matched paths", index=False)
-    df_unmatched.to_excel(writer, sheet_name="unmatched paths", index=False)
-
-# ---------- Apply Header Formatting ----------
-wb = load_workbook(output_file)
-
-header_fill = PatternFill(start_color="FFD966", end_color="FFD966", fill_type="solid")  # Yellow
-header_font = Font(bold=True, color="000000")  # Bold Black
-
-for sheet_name in wb.sheetnames:
-    sheet = wb[sheet_name]
-    for cell in sheet[1]:  # First row (header)
-        cell.fill = header_fill
-        cell.font = header_font
-
-wb.save(output_file)
+df_matched = pd.DataFrame(matched_rows)
+df_unmatched = pd.DataFrame(unmatched_paths)
+
+if xlsxwriter is not None:
+    with pd.ExcelWriter(output_file, engine="xlsxwriter") as writer:
+        df_matched.to_excel(writer, sheet_name="matched paths", index=False)
+        df_unmatched.to_excel(writer, sheet_name="unmatched paths", index=False)
+
+        # ---------- Apply Header Formatting ----------
+        header_format = writer.book.add_format({
+            "bold": True,
+            "font_color": "#000000",  # Black
+            "bg_color": "#FFD966",    # Yellow
+            "border": 1,
+            "align": "center",
+            "valign": "top",
+        })
+
+        for sheet_name, df in (("matched paths", df_matched), ("unmatched paths", df_unmatched)):
+            sheet = writer.sheets[sheet_name]
+            for col_idx, col in enumerate(df.columns):  # First row (header)
+                sheet.write(0, col_idx, col, header_format)
+else:
+    with pd.ExcelWriter(output_file, engine="openpyxl") as writer:
+        df_matched.to_excel(writer, sheet_name="matched paths", index=False)
+        df_unmatched.to_excel(writer, sheet_name="unmatched paths", index=False)
+
+    # ---------- Apply Header Formatting ----------
+    wb = load_workbook(output_file)
+
+    header_fill = PatternFill(start_color="FFD966", end_color="FFD966", fill_type="solid")  # Yellow
+    header_font = Font(bold=True, color="000000")  # Bold Black
+
+    for sheet_name in wb.sheetnames:
+        sheet = wb[sheet_name]
+        for cell in sheet[1]:  # First row (header)
+            cell.fill = header_fill
+            cell.font = header_font
+
+    wb.save(output_file)
 
 print(f" Report generated successfully with formatted headers: {output_file}")
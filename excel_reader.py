@@ -1,48 +1,68 @@
-import re
-from collections import OrderedDict
 import json
 import pandas as pd
 
+try:
+    import orjson  # Rust-backed encoder, much faster on large mappings
+except ImportError:
+    orjson = None
+
 def count_level(s: str) -> int:
-    if s is None or not str(s).strip():
+    if not s:
         return 0
-    m = re.match(r'^\s*(>+)', str(s))
-    return len(m.group(1)) if m else 0
+    t = s.lstrip()
+    return len(t) - len(t.lstrip('>'))
 
 def extract_after_colon(s: str) -> str:
     """Strip leading '>' and return text after the last ':' (or whole text if no colon)."""
-    if s is None:
+    if not s:
         return ''
-    s = str(s).strip()
-    s = re.sub(r'^\s*>+\s*', '', s)
-    if ':' in s:
-        return s.split(':')[-1].strip()
-    return s.strip()
+    s = s.strip()
+    if s[:1] == '>':
+        s = s.lstrip('>').lstrip()
+    # rfind is -1 when there is no colon, which keeps the whole text
+    return s[s.rfind(':') + 1:].strip()
+
+def parse_cell(s: str) -> tuple:
+    """count_level and extract_after_colon of an element cell in one pass: (level, name)."""
+    if not s:
+        return 0, ''
+    t = s.strip()
+    body = t.lstrip('>')
+    return len(t) - len(body), body[body.rfind(':') + 1:].strip()
 
 def parse_rows(rows):
     """
     rows: list of tuples (element_raw, type_raw) in sheet order.
     Returns:
-      - mapping: OrderedDict { type_token: OrderedDict(childName -> None or list) }
+      - mapping: dict { type_token: dict(childName -> None or list) } (insertion ordered)
       - all_leaves: ordered list of leaf strings
     """
     n = len(rows)
     i = 0
-    result = OrderedDict()
+    result = {}
     all_leaves = []
+    seen_leaves = set()
+
+    # parse every cell once up front; the descent below only indexes these
+    levels = []
+    names = []
+    for r in rows:
+        lvl, name = parse_cell(r[0])
+        levels.append(lvl)
+        names.append(name)
+    types = [extract_after_colon(r[1]) for r in rows]
 
     def parse_children(start_idx, base_level):
         """Parse subtree starting at start_idx where children are level base_level+1."""
         children = []
         idx = start_idx
         while idx < n:
-            elem_raw, _ = rows[idx]
-            lvl = count_level(elem_raw)
+            lvl = levels[idx]
             if lvl <= base_level:
                 break
             if lvl == base_level + 1:
-                name = extract_after_colon(elem_raw)
-                if idx + 1 < n and count_level(rows[idx+1][0]) > lvl:
+                name = names[idx]
+                if idx + 1 < n and levels[idx+1] > lvl:
                     nested_list, new_idx = parse_children(idx + 1, lvl)
                     children.append({name: nested_list})
                     idx = new_idx
@@ -55,18 +75,16 @@ def parse_rows(rows):
         return children, idx
 
     while i < n:
-        elem_raw, type_raw = rows[i]
-        lvl = count_level(elem_raw)
-        if lvl != 0:
+        if levels[i] != 0:
             i += 1
             continue
-        top_elem = extract_after_colon(elem_raw)
-        top_type = extract_after_colon(type_raw) if type_raw else top_elem
+        top_elem = names[i]
+        top_type = types[i] if rows[i][1] else top_elem
 
         # If next row has arrows → subtree; else standalone
-        if i + 1 < n and count_level(rows[i+1][0]) > 0:
+        if i + 1 < n and levels[i+1] > 0:
             children_list, next_i = parse_children(i+1, 0)
-            od = OrderedDict()
+            od = {}
             for ch in children_list:
                 if isinstance(ch, str):
                     od[ch] = None
@@ -79,7 +97,8 @@ def parse_rows(rows):
             def collect_leaves_from_list(lst):
                 for item in lst:
                     if isinstance(item, str):
-                        if item not in all_leaves:
+                        if item not in seen_leaves:
+                            seen_leaves.add(item)
                             all_leaves.append(item)
                     elif isinstance(item, dict):
                         for nk, nv in item.items():
@@ -88,31 +107,34 @@ def parse_rows(rows):
             i = next_i
         else:
             result[top_type] = top_elem
-            if top_elem not in all_leaves:
+            if top_elem not in seen_leaves:
+                seen_leaves.add(top_elem)
                 all_leaves.append(top_elem)
             i += 1
 
     return result, all_leaves
 
-def mapping_to_jsonable(mapping):
-    out = {}
-    for top, children in mapping.items():
-        if isinstance(children, str):
-            out[top] = children
-        else:
-            conv = {}
-            for k, v in children.items():
-                conv[k] = v
-            out[top] = conv
-    return out
-
 # ---------------- Excel Integration ----------------
+def _read_sheet(file_path, engine):
+    # Read only columns B and C of the "Message Response" sheet, starting at Excel row 3
+    return pd.read_excel(
+        file_path,
+        sheet_name="Message Response",
+        skiprows=2,
+        usecols=[1, 2],
+        dtype=str,
+        engine=engine
+    ).fillna("")
+
 def process_excel(file_path):
-    # Open the "Message Response" sheet
-    df = pd.read_excel(file_path, sheet_name="Message Response", dtype=str)
+    # calamine (python-calamine) is much faster than openpyxl; fall back if it is not installed
+    try:
+        df = _read_sheet(file_path, "calamine")
+    except (ImportError, ValueError):
+        df = _read_sheet(file_path, None)  # pandas picks the engine from the extension (xlrd for .xls)
 
-    # Keep only the two needed columns
-    df = df[["Response Element Name", "Type"]].fillna("")
+    # Rename for clarity
+    df.columns = ["Response Element Name", "Type"]
 
     # Convert to list of tuples
     rows = list(zip(df["Response Element Name"], df["Type"]))
@@ -122,41 +144,23 @@ def process_excel(file_path):
 
     return mapping, leaves
 
+def _dump_json(obj, path):
+    if orjson is not None:
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    else:
+        with open(path, "w") as f:
+            json.dump(obj, f, indent=2)
+
 # ---------------- Example Usage ----------------
 if __name__ == "__main__":
     excel_file = "account_list.xlsx"   # your input file
     mapping, leaves = process_excel(excel_file)
 
     # Save hierarchical mapping
-    with open("final_mapping.json", "w") as f:
-        json.dump(mapping_to_jsonable(mapping), f, indent=2)
+    _dump_json(mapping, "final_mapping.json")
 
     # Save flat leaf list
-    with open("final_leaves.json", "w") as f:
-        json.dump(leaves, f, indent=2)
+    _dump_json(leaves, "final_leaves.json")
 
     print("Mapping and leaves extracted successfully!")
-
-# import pandas as pd
-
-# def process_excel(file_path):
-#     # Read starting from row 2 (Excel row 3) and only 2nd & 3rd columns
-#     df = pd.read_excel(
-#         file_path,
-#         sheet_name="Message Response",
-#         skiprows=2,      # skip first 2 rows (row 0 and row 1)
-#         usecols=[1, 2],  # 2nd and 3rd cols (B, C in Excel)
-#         dtype=str
-#     ).fillna("")
-
-#     # Rename for clarity
-#     df.columns = ["Response Element Name", "Type"]
-
-#     # Convert to list of tuples
-#     rows = list(zip(df["Response Element Name"], df["Type"]))
-
-#     # Call your existing parsing logic
-#     mapping, leaves = parse_rows(rows)
-
-#     return mapping, leaves
-
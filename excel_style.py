@@ -1,170 +1,175 @@
 # parse_account_list_final.py
-import re
 import os
+import sys
 import json
-from collections import OrderedDict
 
 import pandas as pd
+from openpyxl import load_workbook
+
+try:
+    import orjson  # Rust-backed encoder, much faster on large structures
+except ImportError:
+    orjson = None
 
 def count_level(s: str) -> int:
-    if s is None or not str(s).strip():
+    if not s:
         return 0
-    m = re.match(r'^\s*(>+)', str(s))
-    return len(m.group(1)) if m else 0
+    t = s.lstrip()
+    return len(t) - len(t.lstrip('>'))
 
 def extract_after_colon(s: str) -> str:
     """Strip leading '>' and return text after the last ':' (or whole text if no colon)."""
-    if s is None:
+    if not s:
         return ''
-    s = str(s).strip()
-    s = re.sub(r'^\s*>+\s*', '', s)
-    if ':' in s:
-        return s.split(':')[-1].strip()
-    return s.strip()
-
-def _parse_children(rows, start_idx, base_level):
-    """
-    Parse children starting at start_idx where children have indentation level base_level+1.
-    Returns (children_list, next_index).
-    children_list uses elements:
-      - string => leaf child
-      - dict {childName: [ ... ]} => child with nested children (list may contain strings or dicts)
-    """
-    n = len(rows)
-    children = []
-    idx = start_idx
-    while idx < n:
-        elem_raw, _ = rows[idx]
-        lvl = count_level(elem_raw)
-        if lvl <= base_level:
-            break
-        if lvl == base_level + 1:
-            name = extract_after_colon(elem_raw)
-            # if this child has deeper descendants
-            if (idx + 1) < n and count_level(rows[idx + 1][0]) > lvl:
-                nested, new_idx = _parse_children(rows, idx + 1, lvl)
-                children.append({name: nested})
-                idx = new_idx
-            else:
-                children.append(name)
-                idx += 1
-        else:
-            # deeper indentation without proper parent -> skip safely
-            idx += 1
-    return children, idx
+    s = s.strip()
+    if s[:1] == '>':
+        s = s.lstrip('>').lstrip()
+    # rfind is -1 when there is no colon, which keeps the whole text
+    return sys.intern(s[s.rfind(':') + 1:].strip())
+
+def parse_cell(s: str) -> tuple:
+    """count_level and extract_after_colon of an element cell in one pass: (level, name)."""
+    if not s:
+        return 0, ''
+    t = s.strip()
+    body = t.lstrip('>')
+    return len(t) - len(body), sys.intern(body[body.rfind(':') + 1:].strip())
 
 def parse_rows(rows):
     """
-    rows: list of tuples (element_raw, type_raw) in sheet order.
+    rows: iterable of str tuples (element_raw, type_raw) in sheet order. It is consumed in a
+    single pass with one row of lookahead, so it can be a generator reading the sheet.
     Returns:
       - top_entries: ordered list of ("leaf", name) or ("mapping", key, children_list)
       - leaves: ordered unique list of leaf names
+    children_list uses elements:
+      - string => leaf child
+      - dict {childName: [ ... ]} => child with nested children (list may contain strings or dicts)
     """
-    n = len(rows)
-    i = 0
     top_entries = []   # preserve original order: ('leaf', name) or ('mapping', key, children_list)
     seen = set()
     leaves = []
+    # open child lists of the current mapping as (list, level of its owner); empty between mappings
+    stack = []
+
+    def add_leaf(name):
+        if name not in seen:
+            seen.add(name); leaves.append(name)
+
+    def place_row(elem_raw, type_raw, lvl, name, next_lvl):
+        """Place one row given its level and the level of the row after it (-1 after the last row)."""
+        # close the child lists this row is not nested under
+        while stack and lvl <= stack[-1][1]:
+            stack.pop()
+
+        if stack:
+            parent, parent_level = stack[-1]
+            if lvl == parent_level + 1:
+                # if this child has deeper descendants
+                if next_lvl > lvl:
+                    nested = []
+                    parent.append({name: nested})
+                    stack.append((nested, lvl))
+                else:
+                    parent.append(name)
+                    add_leaf(name)
+            # else: deeper indentation without proper parent -> skip safely
+            return
+
+        # skip blank element names and mis-indented rows outside any mapping
+        if lvl != 0 or not elem_raw.strip():
+            return
 
-    def collect_leaves_from_items(items):
-        for it in items:
-            if isinstance(it, str):
-                if it not in seen:
-                    seen.add(it); leaves.append(it)
-            elif isinstance(it, dict):
-                for nk, nv in it.items():
-                    collect_leaves_from_items(nv)
-
-    while i < n:
-        elem_raw, type_raw = rows[i]
-        # skip blank element names
-        if not elem_raw or not str(elem_raw).strip():
-            i += 1
-            continue
-
-        lvl = count_level(elem_raw)
-        if lvl != 0:
-            # mis-indented top-level row: skip (child rows are handled via parent's parse)
-            i += 1
-            continue
-
-        top_elem = extract_after_colon(elem_raw)
-        # Decide based on next row
-        if (i + 1) < n:
-            next_lvl = count_level(rows[i + 1][0])
-        else:
-            next_lvl = -1
-
-        # Case: next row also top-level -> current is a standalone leaf
-        if next_lvl == 0:
-            top_entries.append(('leaf', top_elem))
-            if top_elem not in seen:
-                seen.add(top_elem); leaves.append(top_elem)
-            i += 1
-            continue
-
-        # Case: next row is indented -> current's TYPE becomes the mapping key
         if next_lvl > 0:
-            # Use type column's right-side as key; fallback to top_elem if type empty
-            key = extract_after_colon(type_raw) if (type_raw and str(type_raw).strip()) else top_elem
-            children_list, next_i = _parse_children(rows, i + 1, 0)
-            top_entries.append(('mapping', key, children_list))
-            # collect leaves from this subtree
-            collect_leaves_from_items(children_list)
-            i = next_i
-            continue
+            # Case: next row is indented -> current's TYPE becomes the mapping key
+            # Use type column's right-side as key; fallback to the element name if type empty
+            key = extract_after_colon(type_raw) if type_raw.strip() else name
+            children = []
+            top_entries.append(('mapping', key, children))
+            stack.append((children, 0))
+        else:
+            # Case: next row also top-level, or last row (no next) -> standalone leaf
+            top_entries.append(('leaf', name))
+            add_leaf(name)
 
-        # Case: last row (no next) -> standalone
-        top_entries.append(('leaf', top_elem))
-        if top_elem not in seen:
-            seen.add(top_elem); leaves.append(top_elem)
-        i += 1
+    # a row can only be placed once the next row's level is known
+    prev = None
+    for elem_raw, type_raw in rows:
+        lvl, name = parse_cell(elem_raw)
+        if prev is not None:
+            place_row(*prev, lvl)
+        prev = (elem_raw, type_raw, lvl, name)
+    if prev is not None:
+        place_row(*prev, -1)
 
     return top_entries, leaves
 
-def format_item_compact(item):
-    """Return compact string for a child item (string or {k:[..]}). No quotes, no nulls."""
-    if isinstance(item, str):
-        return item
-    elif isinstance(item, dict):
-        # single-key dict
-        for k, v in item.items():
-            inner = ",".join(format_item_compact(x) for x in v)
-            return "{" + f"{k}:[{inner}]" + "}"
-    return ""
+def _emit_items_compact(out, items):
+    """Append child items (string or {k:[..]}) comma-separated to the token list out. No quotes, no nulls."""
+    for j, item in enumerate(items):
+        if j:
+            out.append(",")
+        if isinstance(item, str):
+            out.append(item)
+        elif isinstance(item, dict):
+            # single-key dict
+            for k, v in item.items():
+                out.append("{")
+                out.append(k)
+                out.append(":[")
+                _emit_items_compact(out, v)
+                out.append("]}")
+                break
 
 def build_compact_text(top_entries):
-    parts = []
-    for ent in top_entries:
+    # collect every token in one list and join once at the end
+    out = ["{"]
+    for j, ent in enumerate(top_entries):
+        if j:
+            out.append(",")
         if ent[0] == 'leaf':
-            parts.append(ent[1])
+            out.append(ent[1])
         else:
             # ('mapping', key, children)
-            key = ent[1]
-            children = ent[2]
-            children_str = ",".join(format_item_compact(ch) for ch in children)
-            parts.append("{" + f"{key}:{{" + children_str + "}" + "}}")
-    return "{" + ",".join(parts) + "}"
+            out.append("{")
+            out.append(ent[1])
+            out.append(":{")
+            _emit_items_compact(out, ent[2])
+            out.append("}}}")
+    out.append("}")
+    return "".join(out)
 
 # ---------- Excel reading + main ----------
 
+def _iter_rows(file_path):
+    """Yield (element, type) string pairs from columns B and C straight off the sheet."""
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        ws = wb["Message Response"]
+        # rows 1-2 are titles and row 3 is the column header, data starts at Excel row 4
+        for a, b in ws.iter_rows(min_row=4, min_col=2, max_col=3, values_only=True):
+            yield ("" if a is None else str(a)), ("" if b is None else str(b))
+    finally:
+        wb.close()
+
 def process_excel(file_path):
     _, ext = os.path.splitext(file_path)
-    engine = None
     if ext.lower() == ".xls":
-        engine = "xlrd"  # ensure xlrd==1.2.0 installed for .xls
-
-    df = pd.read_excel(
-        file_path,
-        sheet_name="Message Response",
-        skiprows=2,      # start at Excel row 3 (0-based skiprows)
-        usecols=[1, 2],  # B and C columns (Response Element Name, Type)
-        dtype=str,
-        engine=engine
-    ).fillna("")
+        # openpyxl can't open .xls, read it through pandas + xlrd (ensure xlrd==1.2.0 installed)
+        df = pd.read_excel(
+            file_path,
+            sheet_name="Message Response",
+            skiprows=2,      # start at Excel row 3 (0-based skiprows)
+            usecols=[1, 2],  # B and C columns (Response Element Name, Type)
+            dtype=str,
+            engine="xlrd"
+        ).fillna("")
+        df.columns = ["Response Element Name", "Type"]
+        rows = list(zip(df["Response Element Name"], df["Type"]))
+    else:
+        # stream rows into the parser; no DataFrame or row list is built
+        rows = _iter_rows(file_path)
 
-    df.columns = ["Response Element Name", "Type"]
-    rows = list(zip(df["Response Element Name"], df["Type"]))
     top_entries, leaves = parse_rows(rows)
     return top_entries, leaves
 
@@ -177,68 +182,99 @@ if __name__ == "__main__":
     with open("final_mapping_compact.txt", "w", encoding="utf-8") as f:
         f.write(compact_str)
 
-    # Write final leaves (flat list)
-    with open("final_leaves.json", "w", encoding="utf-8") as f:
-        json.dump(leaves, f, indent=2)
+    # Write final leaves (flat list, compact: it is read by tools, not people)
+    if orjson is not None:
+        with open("final_leaves.json", "wb") as f:
+            f.write(orjson.dumps(leaves))
+    else:
+        with open("final_leaves.json", "w", encoding="utf-8") as f:
+            json.dump(leaves, f, separators=(",", ":"))
 
 
 import re
+import os
+import sys
 import json
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import orjson  # Rust-backed encoder, much faster on large structures
+except ImportError:
+    orjson = None
+
+_STRIP_RE = re.compile(r'^\s*>+\s*')
 
 # ---------------- Utilities ----------------
 
 def count_level(s: str) -> int:
     """Count leading > characters (indentation level)."""
-    if s is None or not str(s).strip():
+    if s is None:
         return 0
-    m = re.match(r'^\s*(>+)', str(s))
-    return len(m.group(1)) if m else 0
+    t = str(s).lstrip()
+    return len(t) - len(t.lstrip('>'))
 
 def clean_name(s: str) -> str:
     """Remove > and namespace, keep only name after last ':'."""
     if s is None:
         return ""
     t = str(s).strip()
-    t = re.sub(r'^\s*>+\s*', '', t)   # remove leading > 
-    if ':' in t:
-        t = t.split(':')[-1]
-    return t.strip().lower()
+    t = _STRIP_RE.sub('', t)   # remove leading > 
+    t = t.rpartition(':')[2]    # whole text when there is no colon
+    return sys.intern(t.strip().lower())
 
 def clean_type(t: str) -> str:
     """Clean type: only take part after last ':' (or None if empty)."""
     if t is None or not str(t).strip():
         return None
     tt = str(t).strip()
-    if ':' in tt:
-        tt = tt.split(':')[-1]
-    return tt.strip().lower()
+    tt = tt.rpartition(':')[2]
+    return sys.intern(tt.strip().lower())
+
+def _clean_columns(df):
+    """
+    Vectorized count_level / clean_name / clean_type over the two sheet columns.
+    Returns (levels, names, types) as lists aligned with the rows of df.
+    """
+    elem = df["Response Element Name"].map(str).str.strip()
+    unarrowed = elem.str.lstrip(">")
+    levels = (elem.str.len() - unarrowed.str.len()).tolist()
+    names = list(map(sys.intern, unarrowed.str.rsplit(":", n=1).str[-1].str.strip().str.lower().tolist()))
+
+    typ = df["Type"].map(str).str.strip()
+    cleaned = typ.str.rsplit(":", n=1).str[-1].str.strip().str.lower().tolist()
+    types = [sys.intern(t) if raw else None for raw, t in zip(typ.tolist(), cleaned)]
+    return levels, names, types
 
 # ---------------- Core structure builder ----------------
 
-def build_structure(rows, start=0, level=0):
+def build_structure(levels, names, start=0, level=0):
+    """levels/names are the per-row values from _clean_columns."""
     result = {}
+    stack = [(result, level)]   # (container, level its rows sit at)
     i = start
-    n = len(rows)
+    n = len(levels)
 
     while i < n:
-        elem_raw, _ = rows[i]
-        lvl = count_level(elem_raw)
+        lvl = levels[i]
+        container, cur = stack[-1]
 
-        if lvl < level:
-            break
+        if lvl < cur:
+            if len(stack) == 1:
+                break
+            stack.pop()
+            continue
 
-        if lvl == level:
-            name = clean_name(elem_raw)
-            next_lvl = count_level(rows[i+1][0]) if (i+1) < n else -1
+        if lvl == cur:
+            name = names[i]
+            next_lvl = levels[i+1] if (i+1) < n else -1
 
-            if next_lvl > level:
-                children, new_i = build_structure(rows, i+1, level+1)
-                result[name] = children
-                i = new_i
-                continue
+            if next_lvl > cur:
+                children = {}
+                container[name] = children
+                stack.append((children, cur + 1))
             else:
-                result[name] = []
+                container[name] = []
         i += 1
 
     return result, i
@@ -249,16 +285,14 @@ def process_dataframe(df):
     df = df[(df["Response Element Name"].astype(str).str.strip() != "") | 
             (df["Type"].astype(str).str.strip() != "")]
     
-    rows = list(zip(df["Response Element Name"], df["Type"]))
-    
-    # mapping
-    mapping = {}
-    for elem_raw, type_raw in rows:
-        key = clean_name(elem_raw)
-        mapping[key] = clean_type(type_raw)
+    levels, names, types = _clean_columns(df)
 
-    # structure
-    structure, _ = build_structure(rows, start=0, level=0)
+    # mapping: later rows win for repeated names, as with per-row assignment
+    mapping = dict(zip(names, types))
+    mapping.pop("", None)   # a type with no element name has nothing to key on
+
+    # structure: unnamed rows stay in, they still close the block above them
+    structure, _ = build_structure(levels, names, start=0, level=0)
     return mapping, structure
 
 # ---------------- Extract leaf data fields ----------------
@@ -270,7 +304,8 @@ def extract_datafields(structure):
     def dfs(node):
         for k, v in node.items():
             if v == []:
-                fields.append(k)
+                if k:   # an unnamed row is not a data field
+                    fields.append(k)
             elif isinstance(v, dict):
                 dfs(v)
 
@@ -279,25 +314,43 @@ def extract_datafields(structure):
 
 # ---------------- Batch processing ----------------
 
-def process_files(excel_files, mapping_files, datafield_files):
-    for xlsx, jfile, tfile in zip(excel_files, mapping_files, datafield_files):
-        print(f"Processing {xlsx} → {jfile}, {tfile}")
+def _read_sheet(xlsx, engine):
+    # first sheet, columns A and B, no header row; read as text so blanks become ""
+    return pd.read_excel(xlsx, sheet_name=0, usecols=[0,1], header=None,
+                         dtype=str, engine=engine).fillna("")
 
-        df = pd.read_excel(xlsx, sheet_name=0, usecols=[0,1], header=None)
-        df.columns = ["Response Element Name", "Type"]
+def _process_one(xlsx, jfile, tfile):
+    print(f"Processing {xlsx} → {jfile}, {tfile}")
 
-        mapping, structure = process_dataframe(df)
-        datafields = extract_datafields(structure)
+    # calamine (python-calamine) is much faster than openpyxl; fall back if it is not installed
+    try:
+        df = _read_sheet(xlsx, "calamine")
+    except (ImportError, ValueError):
+        df = _read_sheet(xlsx, None)
+    df.columns = ["Response Element Name", "Type"]
 
-        # dump mapping.json
+    mapping, structure = process_dataframe(df)
+    datafields = extract_datafields(structure)
+
+    # dump mapping.json
+    if orjson is not None:
+        with open(jfile, "wb") as f:
+            f.write(orjson.dumps(mapping, option=orjson.OPT_INDENT_2))
+    else:
         with open(jfile, "w") as f:
             json.dump(mapping, f, indent=2)
 
-        # dump datafields.txt
-        with open(tfile, "w") as f:
-            f.write("\n".join(datafields))
+    # dump datafields.txt, one field per line
+    with open(tfile, "w") as f:
+        f.writelines(f"{x}\n" for x in datafields)
+
+    print(f"Done: {xlsx}")
 
-        print(f"Done: {xlsx}")
+def process_files(excel_files, mapping_files, datafield_files):
+    # Workbooks are independent, so parse them on separate cores
+    workers = min(os.cpu_count() or 1, len(excel_files) or 1)
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        list(ex.map(_process_one, excel_files, mapping_files, datafield_files))
 
 # ---------------- Example Usage ----------------
 if __name__ == "__main__":
@@ -309,19 +362,21 @@ if __name__ == "__main__":
 
 
 import re
+import sys
 import json
 import pandas as pd
 from typing import List, Tuple, Dict, Any
 
+_STRIP_RE = re.compile(r'^\s*[>/]+\s*')
+
 # ---------- Utilities ----------
 
 def count_level(s: str) -> int:
     """Count leading '>' or '/' characters (indentation level)."""
     if s is None:
         return 0
-    s = str(s)
-    m = re.match(r'^\s*([>/]+)', s)
-    return len(m.group(1)) if m else 0
+    t = str(s).lstrip()
+    return len(t) - len(t.lstrip('>/'))
 
 def clean_name(s: str) -> str:
     """
@@ -331,21 +386,27 @@ def clean_name(s: str) -> str:
     if s is None:
         return ""
     t = str(s).strip()
-    t = re.sub(r'^\s*[>/]+\s*', '', t)   # strip leading arrows/slashes
-    if ':' in t:
-        t = t.split(':')[-1]
-    return t.strip().lower()
+    t = _STRIP_RE.sub('', t)   # strip leading arrows/slashes
+    t = t.rpartition(':')[2]    # whole text when there is no colon
+    return sys.intern(t.strip().lower())
+
+def parse_cell(s) -> Tuple[int, str]:
+    """count_level and clean_name of an element cell in one pass: (level, name)."""
+    if s is None:
+        return 0, ""
+    t = str(s).strip()
+    body = t.lstrip('>/')
+    return len(t) - len(body), sys.intern(body[body.rfind(':') + 1:].strip().lower())
 
 def clean_type(t: str) -> str:
     """Return type (right of colon) or None if empty."""
     if t is None or str(t).strip() == "":
         return None
     tt = str(t).strip()
-    if ':' in tt:
-        tt = tt.split(':')[-1]
-    return tt.strip().lower()
+    tt = tt.rpartition(':')[2]
+    return sys.intern(tt.strip().lower())
 
-# ---------- Structure builder (recursive) ----------
+# ---------- Structure builder ----------
 
 def parse_structure(rows: List[Tuple[str, str]], start: int = 0, base_level: int = 0) -> Tuple[Dict[str, Any], int]:
     """
@@ -353,34 +414,48 @@ def parse_structure(rows: List[Tuple[str, str]], start: int = 0, base_level: int
     rows: list of tuples (element_raw, type_raw) in original order.
     Returns: (mapping_dict_at_this_level, next_index_to_process)
     """
-    n = len(rows)
+    # Classify every row once; the recursion below only indexes these lists
+    levels: List[int] = []
+    names: List[str] = []
+    for elem_raw, _ in rows:
+        lvl, name = parse_cell(elem_raw)
+        levels.append(lvl)
+        names.append(name)
+    return _parse_levels(levels, names, start, base_level)
+
+def _parse_levels(levels: List[int], names: List[str], start: int, base_level: int) -> Tuple[Dict[str, Any], int]:
+    n = len(levels)
     i = start
     result: Dict[str, Any] = {}
+    # Open blocks as (dict, level its rows sit at); replaces the recursive descent
+    stack: List[Tuple[Dict[str, Any], int]] = [(result, base_level)]
 
     while i < n:
-        elem_raw, _ = rows[i]
-        lvl = count_level(elem_raw)
-
-        # If we've gone up to a previous level, return to caller
-        if lvl < base_level:
-            break
+        lvl = levels[i]
+        container, cur = stack[-1]
+
+        # If we've gone up to a previous level, close the current block
+        if lvl < cur:
+            if len(stack) == 1:
+                break
+            stack.pop()
+            continue
 
-        if lvl == base_level:
-            name = clean_name(elem_raw)
+        if lvl == cur:
+            name = names[i]
 
             # Lookahead to decide if this node has children
-            next_lvl = count_level(rows[i+1][0]) if (i + 1) < n else -1
-
-            if next_lvl > base_level:
-                # parse children at next level
-                children_dict, next_i = parse_structure(rows, i + 1, base_level + 1)
-                result[name] = children_dict
-                i = next_i
-                continue
+            next_lvl = levels[i + 1] if (i + 1) < n else -1
+
+            if next_lvl > cur:
+                # children follow at the next level
+                children_dict: Dict[str, Any] = {}
+                container[name] = children_dict
+                stack.append((children_dict, cur + 1))
             else:
                 # no children -> leaf (empty list)
-                result[name] = []
-        # else lvl > base_level should not happen (handled by recursion)
+                container[name] = []
+        # else lvl > cur is a mis-indented row and is skipped
         i += 1
 
     return result, i
@@ -1,93 +1,145 @@
 import re
+import sys
 import json
 import os
 import pandas as pd
+from openpyxl import load_workbook
+
+try:
+    from python_calamine import CalamineWorkbook  # Rust reader, much faster than openpyxl
+except ImportError:
+    CalamineWorkbook = None
+
+try:
+    import orjson  # Rust-backed encoder, much faster on large structures
+except ImportError:
+    orjson = None
+
+_STRIP_RE = re.compile(r'^\s*>+\s*')
 
 # ---------------- Utilities ----------------
 
 def count_level(s: str) -> int:
     """Count leading '>' characters (indentation level)."""
-    if s is None or not str(s).strip():
+    if s is None:
         return 0
-    m = re.match(r'^\s*(>+)', str(s))
-    return len(m.group(1)) if m else 0
+    t = str(s).lstrip()
+    return len(t) - len(t.lstrip('>'))
 
 def clean_name(s: str) -> str:
     """Strip leading >, take text after last ':' and lowercase."""
     if s is None:
         return ""
     t = str(s).strip()
-    t = re.sub(r'^\s*>+\s*', '', t)        # remove leading arrows
-    if ':' in t:
-        t = t.split(':')[-1]
-    return t.strip().lower()
+    t = _STRIP_RE.sub('', t)        # remove leading arrows
+    t = t.rpartition(':')[2]    # whole text when there is no colon
+    return sys.intern(t.strip().lower())
+
+def parse_cell(s: str):
+    """count_level and clean_name of an element cell in one pass: (level, name)."""
+    if not s:
+        return 0, ""
+    t = s.strip()
+    body = t.lstrip('>')
+    return len(t) - len(body), sys.intern(body[body.rfind(':') + 1:].strip().lower())
 
 def clean_type(t: str) -> str:
     """Take text after last ':' in type and lowercase (or None)."""
-    if t is None or not str(t).strip():
+    if not t:
         return None
-    tt = str(t).strip()
-    if ':' in tt:
-        tt = tt.split(':')[-1]
-    return tt.strip().lower()
+    tt = t.strip()
+    if not tt:
+        return None
+    tt = tt.rpartition(':')[2]
+    return sys.intern(tt.strip().lower())
 
 # ---------------- Core parser ----------------
 
-def build_structure(rows, start=0, level=0):
+def build_structure(levels, names, types, start=0, level=0):
+    """levels/names/types are the per-row values collected by process_excel."""
     result = []
+    stack = [(result, level)]   # (container, level its rows sit at)
     i = start
-    n = len(rows)
+    n = len(levels)
 
     while i < n:
-        elem_raw, type_raw = rows[i]
-        lvl = count_level(elem_raw)
-
-        if lvl < level:
-            break
-
-        if lvl == level:
-            name = clean_name(elem_raw)
-            next_lvl = count_level(rows[i+1][0]) if (i + 1) < n else -1
-
-            if next_lvl > level:
-                key = clean_type(type_raw) or name
-                children, new_i = build_structure(rows, i+1, level+1)
-                result.append({key: children})
-                i = new_i
-                continue
+        lvl = levels[i]
+        container, cur = stack[-1]
+
+        if lvl < cur:
+            if len(stack) == 1:
+                break
+            stack.pop()          # close this block; re-check the row one level up
+            continue
+
+        if lvl == cur:
+            name = names[i]
+            next_lvl = levels[i+1] if (i + 1) < n else -1
+
+            if next_lvl > cur:
+                key = types[i] or name
+                children = []
+                container.append({key: children})
+                stack.append((children, cur + 1))
             else:
                 # Leaf node
-                result.append(name)
+                container.append(name)
         i += 1
 
     return result, i
 
-def process_excel(file_path):
-    """Read Excel, clean empty rows, return structured data."""
+def _cell(v):
+    # calamine returns every number as float; keep whole numbers looking like ints
+    if isinstance(v, float) and v.is_integer():
+        return int(v)
+    return v
+
+def _iter_rows(file_path):
+    """Yield raw (element, type) cells from columns B and C, starting at Excel row 4."""
     _, ext = os.path.splitext(file_path)
-    engine = None
     if ext.lower() == ".xls":
-        engine = "xlrd"  # requires xlrd==1.2.0 for .xls
-
-    df = pd.read_excel(
-        file_path,
-        sheet_name="Message Response",
-        skiprows=2,      # start at Excel row 3
-        usecols=[1, 2],  # B and C columns
-        dtype=str,
-        engine=engine
-    )
-
-    # Drop completely empty rows
-    df = df.dropna(how="all").fillna("")
-
-    df.columns = ["Response Element Name", "Type"]
-    rows = list(zip(df["Response Element Name"], df["Type"]))
+        # requires xlrd==1.2.0 for .xls
+        df = pd.read_excel(file_path, sheet_name="Message Response", skiprows=2,
+                           usecols=[1, 2], dtype=str, engine="xlrd")
+        yield from zip(df.iloc[:, 0], df.iloc[:, 1])
+    elif CalamineWorkbook is not None:
+        # Read the sheet and close the workbook right away so the file isn't left locked
+        # (python-calamine before 0.3 has no close() and is not a context manager)
+        wb = CalamineWorkbook.from_path(file_path)
+        try:
+            rows = wb.get_sheet_by_name("Message Response").to_python(skip_empty_area=False)
+        finally:
+            close = getattr(wb, "close", None)
+            if close is not None:
+                close()
+        # rows 1-2 are titles and row 3 is the column header
+        for row in rows[3:]:
+            if len(row) > 1:
+                yield _cell(row[1]), (_cell(row[2]) if len(row) > 2 else "")
+    else:
+        wb = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            ws = wb["Message Response"]
+            yield from ws.iter_rows(min_row=4, min_col=2, max_col=3, values_only=True)
+        finally:
+            wb.close()
 
-    # Clean empty element names
-    rows = [(a, b) for a, b in rows if str(a).strip()]
-
-    structure, _ = build_structure(rows, start=0, level=0)
+def process_excel(file_path):
+    """Read Excel, clean empty rows, return structured data."""
+    levels, names, types = [], [], []
+    for elem, typ in _iter_rows(file_path):
+        # Skip empty element names (NaN from the .xls reader counts as empty)
+        if elem is None or elem != elem:
+            continue
+        elem = str(elem)    # cast once here; the helpers below take str as-is
+        if not elem.strip():
+            continue
+        lvl, name = parse_cell(elem)
+        levels.append(lvl)
+        names.append(name)
+        types.append(None if typ is None or typ != typ else clean_type(str(typ)))
+
+    structure, _ = build_structure(levels, names, types, start=0, level=0)
 
     # ensure outer structure is a dict
     if isinstance(structure, list) and len(structure) == 1 and isinstance(structure[0], dict):
@@ -96,19 +148,18 @@ def process_excel(file_path):
 
 # ---------------- Leaf extractor ----------------
 
-def extract_leaves(node, leaves=None):
-    """Recursively extract all leaf strings from the nested structure."""
-    if leaves is None:
-        leaves = []
-
-    if isinstance(node, str):
-        leaves.append(node)
-    elif isinstance(node, dict):
-        for v in node.values():
-            extract_leaves(v, leaves)
-    elif isinstance(node, list):
-        for item in node:
-            extract_leaves(item, leaves)
+def extract_leaves(node):
+    """Extract all leaf strings from the nested structure, in document order."""
+    leaves = []
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, str):
+            leaves.append(node)
+        elif isinstance(node, dict):
+            stack.extend(reversed(node.values()))   # reversed so the first child pops first
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
 
     return leaves
 
@@ -119,16 +170,19 @@ if __name__ == "__main__":
     final_structure = process_excel(excel_file)
 
     # Save JSON
-    with open("final_structure.json", "w", encoding="utf-8") as f:
-        json.dump(final_structure, f, indent=2, ensure_ascii=False)
+    if orjson is not None:
+        with open("final_structure.json", "wb") as f:
+            f.write(orjson.dumps(final_structure, option=orjson.OPT_INDENT_2))
+    else:
+        with open("final_structure.json", "w", encoding="utf-8") as f:
+            json.dump(final_structure, f, indent=2, ensure_ascii=False)
 
     # Extract leaves
     leaves = extract_leaves(final_structure)
 
     # Save leaves
     with open("leaf_nodes.txt", "w", encoding="utf-8") as f:
-        for leaf in leaves:
-            f.write(leaf + "\n")
+        f.writelines(f"{leaf}\n" for leaf in leaves)
 
     print("=== Final Structure ===")
     print(json.dumps(final_structure, indent=2))
@@ -139,71 +193,96 @@ if __name__ == "__main__":
 
 
 import re
+import sys
 import json
 import pandas as pd
 
+try:
+    import orjson  # Rust-backed encoder, much faster on large structures
+except ImportError:
+    orjson = None
+
+_STRIP_RE = re.compile(r'^\s*>+\s*')
+
 # ---------------- Utilities ----------------
 
 def count_level(s: str) -> int:
     """Count leading '>' characters (indentation level)."""
-    if s is None or not str(s).strip():
+    if s is None:
         return 0
-    m = re.match(r'^\s*(>+)', str(s))
-    return len(m.group(1)) if m else 0
+    t = str(s).lstrip()
+    return len(t) - len(t.lstrip('>'))
 
 def clean_name(s: str) -> str:
     """Strip leading >, take text after last ':' and lowercase."""
     if s is None:
         return ""
     t = str(s).strip()
-    t = re.sub(r'^\s*>+\s*', '', t)        # remove leading arrows
-    if ':' in t:
-        t = t.split(':')[-1]
-    return t.strip().lower()
+    t = _STRIP_RE.sub('', t)        # remove leading arrows
+    t = t.rpartition(':')[2]    # whole text when there is no colon
+    return sys.intern(t.strip().lower())
 
 def clean_type(t: str) -> str:
     """Take text after last ':' in type and lowercase (or None)."""
     if t is None or not str(t).strip():
         return None
     tt = str(t).strip()
-    if ':' in tt:
-        tt = tt.split(':')[-1]
-    return tt.strip().lower()
+    tt = tt.rpartition(':')[2]
+    return sys.intern(tt.strip().lower())
+
+def _clean_columns(df):
+    """
+    Vectorized count_level / clean_name / clean_type over the two sheet columns.
+    Returns (levels, names, types) as lists aligned with the rows of df.
+    """
+    elem = df["Response Element Name"].map(str).str.strip()
+    unarrowed = elem.str.lstrip(">")
+    levels = (elem.str.len() - unarrowed.str.len()).tolist()
+    names = list(map(sys.intern, unarrowed.str.rsplit(":", n=1).str[-1].str.strip().str.lower().tolist()))
+
+    typ = df["Type"].map(str).str.strip()
+    cleaned = typ.str.rsplit(":", n=1).str[-1].str.strip().str.lower().tolist()
+    types = [sys.intern(t) if raw else None for raw, t in zip(typ.tolist(), cleaned)]
+    return levels, names, types
 
 # ---------------- Core parser ----------------
 
-def build_structure(rows, start=0, level=0):
+def build_structure(levels, names, types, start=0, level=0):
+    """levels/names/types are the per-row values from _clean_columns."""
     result = []
+    stack = [(result, level)]   # (container, level its rows sit at)
     i = start
-    n = len(rows)
+    n = len(levels)
 
     while i < n:
-        elem_raw, type_raw = rows[i]
-        lvl = count_level(elem_raw)
-
-        if lvl < level:
-            break
-
-        if lvl == level:
-            name = clean_name(elem_raw)
-            next_lvl = count_level(rows[i+1][0]) if (i + 1) < n else -1
-
-            if next_lvl > level:
-                key = clean_type(type_raw) or name
-                children, new_i = build_structure(rows, i+1, level+1)
-                result.append({key: children})
-                i = new_i
-                continue
+        lvl = levels[i]
+        container, cur = stack[-1]
+
+        if lvl < cur:
+            if len(stack) == 1:
+                break
+            stack.pop()          # close this block; re-check the row one level up
+            continue
+
+        if lvl == cur:
+            name = names[i]
+            next_lvl = levels[i+1] if (i + 1) < n else -1
+
+            if next_lvl > cur:
+                key = types[i] or name
+                children = []
+                container.append({key: children})
+                stack.append((children, cur + 1))
             else:
                 # Leaf node
-                result.append(name)
+                container.append(name)
         i += 1
 
     return result, i
 
 def process_dataframe(df):
-    rows = list(zip(df["Response Element Name"], df["Type"]))
-    structure, _ = build_structure(rows, start=0, level=0)
+    levels, names, types = _clean_columns(df)
+    structure, _ = build_structure(levels, names, types, start=0, level=0)
 
     # ensure outer structure is a dict (for JSON)
     if isinstance(structure, list) and len(structure) == 1 and isinstance(structure[0], dict):
@@ -212,19 +291,18 @@ def process_dataframe(df):
 
 # ---------------- Leaf extractor ----------------
 
-def extract_leaves(node, leaves=None):
-    """Recursively extract all leaf strings from the nested structure."""
-    if leaves is None:
-        leaves = []
-
-    if isinstance(node, str):
-        leaves.append(node)
-    elif isinstance(node, dict):
-        for v in node.values():
-            extract_leaves(v, leaves)
-    elif isinstance(node, list):
-        for item in node:
-            extract_leaves(item, leaves)
+def extract_leaves(node):
+    """Extract all leaf strings from the nested structure, in document order."""
+    leaves = []
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, str):
+            leaves.append(node)
+        elif isinstance(node, dict):
+            stack.extend(reversed(node.values()))   # reversed so the first child pops first
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
 
     return leaves
 
@@ -257,16 +335,19 @@ df = pd.DataFrame(data, columns=["Response Element Name", "Type"])
 final_structure = process_dataframe(df)
 
 # Step 2: Save JSON
-with open("final_structure.json", "w", encoding="utf-8") as f:
-    json.dump(final_structure, f, indent=2, ensure_ascii=False)
+if orjson is not None:
+    with open("final_structure.json", "wb") as f:
+        f.write(orjson.dumps(final_structure, option=orjson.OPT_INDENT_2))
+else:
+    with open("final_structure.json", "w", encoding="utf-8") as f:
+        json.dump(final_structure, f, indent=2, ensure_ascii=False)
 
 # Step 3: Extract leaves
 leaves = extract_leaves(final_structure)
 
 # Step 4: Save leaves to TXT
 with open("leaf_nodes.txt", "w", encoding="utf-8") as f:
-    for leaf in leaves:
-        f.write(leaf + "\n")
+    f.writelines(f"{leaf}\n" for leaf in leaves)
 
 print("=== Final Structure ===")
 print(json.dumps(final_structure, indent=2))
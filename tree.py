@@ -1,31 +1,155 @@
 import os
+import sys
+import csv
 import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from openpyxl import Workbook
 
+try:
+    from lxml import etree  # libxml2 streaming parser, much faster on large files
+except ImportError:
+    etree = None
+
 # ---------- CONFIGURATION ----------
 BASE_PATH = r"T:/a/logical"   # 👈 change this to your base folder path
 OUTPUT_EXCEL = "gts_tsq_report.xlsx"
+OUTPUT_FORMAT = "xlsx"   # "xlsx", or "csv" for large reports (one <name>_Mapping/_Errors.csv each)
 # ----------------------------------
 
-# Initialize Excel workbook and sheets
-workbook = Workbook()
-sheet_main = workbook.active
-sheet_main.title = "Mapping"
-sheet_error = workbook.create_sheet("Errors")
-
 # Headers
-sheet_main.append(["filename", "subgts", "tsq"])
-sheet_error.append(["parent_gts", "lkpath", "missing_part", "checked_path"])
+MAIN_HEADER = ["filename", "subgts", "tsq"]
+ERROR_HEADER = ["parent_gts", "lkpath", "missing_part", "checked_path"]
+
+# Report rows are collected here and written out once at the end
+main_rows = []
+error_rows = []
+
+completed_files = set()  # Files already processed, as root or sub-gts (normalized paths)
+_parsed = {}  # file path -> (lkpaths, parse error), read ahead by worker processes
+
+# Directory listings read once with os.scandir and reused for every lookup:
+# normcased dir path -> {normcased entry name: is_symlink}, or False if unlistable
+_dir_cache = {}
+
+
+# ---------- Function: Cached directory lookups ----------
+def _listing(dir_path):
+    """
+    Returns the cached listing of dir_path, scanning it on first use.
+    Missing paths list as empty; unreadable ones as False.
+    """
+    key = os.path.normcase(dir_path)
+    entries = _dir_cache.get(key)
+    if entries is None:
+        entries = {}
+        # A folder missing from its parent's listing can't be listed either,
+        # so deeper probes under a missing segment need no syscall
+        head, tail = os.path.split(dir_path)
+        parent_entries = _dir_cache.get(os.path.normcase(head))
+        if (isinstance(parent_entries, dict) and _is_plain(tail)
+                and os.path.normcase(tail) not in parent_entries):
+            _dir_cache[key] = entries
+            return entries
+        try:
+            with os.scandir(dir_path) as it:
+                for entry in it:
+                    try:
+                        is_link = entry.is_symlink()
+                    except OSError:
+                        is_link = True
+                    entries[os.path.normcase(entry.name)] = is_link
+        except (FileNotFoundError, NotADirectoryError):
+            pass
+        except OSError:
+            entries = False
+        _dir_cache[key] = entries
+    return entries
+
+
+def _is_plain(name):
+    # Names the OS may reinterpret ('', '.', '..', separators, drive colons,
+    # trailing dots/spaces on Windows) are left to the filesystem
+    return not (not name or name[-1] in ". " or "/" in name or "\\" in name or ":" in name)
+
+
+def _exists(parent, name):
+    """
+    Same answer as os.path.exists(os.path.join(parent, name)),
+    but taken from parent's cached listing instead of a stat call.
+    """
+    if not parent or not _is_plain(name):
+        return os.path.exists(os.path.join(parent, name))
+
+    entries = _listing(parent)
+    if entries is False:
+        return os.path.exists(os.path.join(parent, name))
+
+    is_link = entries.get(os.path.normcase(name))
+    if is_link is None:
+        return False
+    # A symlink only exists if its target does
+    return not is_link or os.path.exists(os.path.join(parent, name))
+
+
+# ---------- Function: Walk base folder ----------
+def _iter_files(top):
+    """
+    Yields a DirEntry for every file under top, in the same order as
+    os.walk's top-down (dir_path, dirs, files) loop; symlinked dirs are not entered.
+    Every listing read is stored in _dir_cache, so lkpath lookups under top never rescan a folder.
+    """
+    stack = [top]
+    while stack:
+        top = stack.pop()
+        dirs, files, entries = [], [], {}
+        try:
+            with os.scandir(top) as it:
+                for entry in it:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    try:
+                        is_link = entry.is_symlink()
+                    except OSError:
+                        is_link = True
+                    entries[os.path.normcase(entry.name)] = is_link
+                    (dirs if is_dir else files).append(entry)
+        except OSError:
+            continue
+
+        _dir_cache.setdefault(os.path.normcase(top), entries)
+        yield from files
+
+        for entry in reversed(dirs):
+            if not entries[os.path.normcase(entry.name)]:
+                stack.append(entry.path)
+
+
+def _stem(name):
+    """
+    File name without its 4-char extension (".gts"/".tsq"), as os.path.splitext would give it.
+    Callers only pass names that end in one of the two.
+    """
+    stem = name[:-4]
+    # splitext ignores leading dots, so "..gts" has no extension to strip
+    return stem if stem.strip(".") else name
+
 
-visited_files = set()  # To prevent infinite recursion
+def _file_key(file_path):
+    # Alias spellings of one file (a/./b, a//b, case on Windows) share one key
+    return os.path.normcase(os.path.normpath(file_path))
 
 
 # ---------- Function: Resolve lkpath ----------
+@lru_cache(maxsize=None)
 def resolve_lkpath(base_path, lkpath):
     """
     Resolves lkpath step by step as per rules.
     Returns (found_path, found_type, missing_part)
     found_type = 'gts' | 'tsq' | 'error'
+    The tree doesn't change during a run, so each (base_path, lkpath) is resolved once.
     """
     parts = lkpath.split('/')
     found_base = None
@@ -33,89 +157,180 @@ def resolve_lkpath(base_path, lkpath):
     missing_part = None
 
     # Step-by-step check (a/b/c/d -> check a, then b, then c, etc.)
-    for i in range(len(parts)):
-        temp_path = os.path.join(base_path, *parts[:i + 1])
-        if os.path.exists(temp_path):
+    # Each prefix is looked up in its parent's cached listing
+    parent = base_path
+    for part in parts:
+        temp_path = os.path.join(parent, part)
+        if _exists(parent, part):
             found_base = temp_path
             checked_path = temp_path
-        else:
-            continue
+        parent = temp_path
 
     # If no base folder found at all
     if not found_base:
         return (os.path.join(base_path, lkpath), "error", parts[-1])
 
-    # Check final file existence (.gts or .tsq)
+    # Check final file existence (.gts or .tsq) in found_base's cached listing
     final_candidate = os.path.join(found_base, parts[-1])
-    if os.path.exists(final_candidate + ".gts"):
+    if _exists(found_base, parts[-1] + ".gts"):
         return (final_candidate + ".gts", "gts", None)
-    elif os.path.exists(final_candidate + ".tsq"):
+    elif _exists(found_base, parts[-1] + ".tsq"):
         return (final_candidate + ".tsq", "tsq", None)
-    elif os.path.exists(final_candidate):
-        # directory exists but not file
-        return (final_candidate, "error", parts[-1])
     else:
-        # final part missing
+        # directory exists but not file, or final part missing
         return (final_candidate, "error", parts[-1])
 
 
+# ---------- Function: Read lkpaths ----------
+def _read_lkpaths(file_path):
+    """
+    Returns the lkpath attribute of every <TestItem> below the root, in document order.
+    With lxml the file is streamed and finished elements are freed as it goes.
+    Raises on a parse error before any lkpath is returned.
+    """
+    if etree is None:
+        root = ET.parse(file_path).getroot()
+        # Same matches as findall(".//TestItem"), without going through ElementPath
+        return [test_item.get("lkpath") for test_item in root.iter("TestItem") if test_item is not root]
+
+    lkpaths = []
+    for event, test_item in etree.iterparse(file_path, events=("start", "end"), tag="TestItem"):
+        if event == "start":
+            # Attributes are complete on start; the root itself is not a match
+            if test_item.getparent() is not None:
+                lkpaths.append(test_item.get("lkpath"))
+        else:
+            test_item.clear()
+            # The root has no parent; its previous siblings are top-level comments/PIs
+            while test_item.getparent() is not None and test_item.getprevious() is not None:
+                del test_item.getparent()[0]
+    return lkpaths
+
+
+def _parse_file(file_path):
+    """
+    Picklable parse step for worker processes.
+    Returns (lkpaths, None), or (None, error message) if the file can't be parsed.
+    """
+    try:
+        return _read_lkpaths(file_path), None
+    except Exception as e:
+        # Parser messages can quote large chunks of the file; keep the report cell short
+        return None, str(e)[:250]
+
+
 # ---------- Function: Process each file ----------
 def process_file(file_path, parent_name):
     """
     Parses XML file, extracts <TestItem> lkpaths,
     resolves them, and logs results.
+    Sub-gts files are followed depth-first with an explicit stack,
+    so rows come out in the same order as a recursive walk.
     """
-    if file_path in visited_files:
-        return
-    visited_files.add(file_path)
+    stack = []  # (parent_name, remaining lkpaths, gts_list, tsq_list) per open file
+    pending = (file_path, parent_name)
 
-    gts_list = []
-    tsq_list = []
+    while pending or stack:
+        if pending:
+            file_path, parent_name = pending
+            pending = None
+            file_key = _file_key(file_path)
+            if file_key in completed_files:
+                continue
+            completed_files.add(file_key)
 
-    try:
-        tree = ET.parse(file_path)
-        root = tree.getroot()
-    except Exception as e:
-        sheet_error.append([parent_name, "parse_error", str(e), file_path])
-        return
+            # Use the worker's result if this file was read ahead, else parse it now
+            lkpaths, error = _parsed.pop(file_path, None) or _parse_file(file_path)
+            if error is not None:
+                error_rows.append([parent_name, "parse_error", error, file_path])
+                continue
+            stack.append((parent_name, iter(lkpaths), [], []))
 
-    for test_item in root.findall(".//TestItem"):
-        lkpath = test_item.get("lkpath")
-        if not lkpath:
-            continue
+        parent_name, lkpaths, gts_list, tsq_list = stack[-1]
+        for lkpath in lkpaths:
+            if not lkpath:
+                continue
 
-        found_path, found_type, missing_part = resolve_lkpath(BASE_PATH, lkpath)
+            # The same lkpaths and sub-gts paths recur across files; keep one copy of each
+            lkpath = sys.intern(lkpath)
+            found_path, found_type, missing_part = resolve_lkpath(BASE_PATH, lkpath)
+            found_path = sys.intern(found_path)
 
-        if found_type == "gts":
-            subgts_name = os.path.splitext(os.path.basename(found_path))[0]
-            gts_list.append(subgts_name)
-            process_file(found_path, subgts_name)  # recursive call
-        elif found_type == "tsq":
-            tsq_name = os.path.splitext(os.path.basename(found_path))[0]
-            tsq_list.append(tsq_name)
+            if found_type == "gts":
+                subgts_name = _stem(os.path.basename(found_path))
+                gts_list.append(subgts_name)
+                pending = (found_path, subgts_name)  # finish the sub-gts before the rest
+                break
+            elif found_type == "tsq":
+                tsq_name = _stem(os.path.basename(found_path))
+                tsq_list.append(tsq_name)
+            else:
+                error_rows.append([parent_name, lkpath, missing_part, found_path])
         else:
-            sheet_error.append([parent_name, lkpath, missing_part, found_path])
+            # All lkpaths done: record result for the main sheet
+            stack.pop()
+            main_rows.append([
+                parent_name,
+                ",".join(gts_list) if gts_list else "-",
+                ",".join(tsq_list) if tsq_list else "-"
+            ])
+
+
+# ---------- Function: Write report ----------
+def save_report():
+    """
+    Writes the Mapping and Errors rows in OUTPUT_FORMAT and returns the files written.
+    "csv" skips the xlsx XML serialisation and writes one file per sheet next to OUTPUT_EXCEL.
+    """
+    sheets = [("Mapping", MAIN_HEADER, main_rows), ("Errors", ERROR_HEADER, error_rows)]
+
+    if OUTPUT_FORMAT == "csv":
+        written = []
+        for title, header, rows in sheets:
+            out_path = f"{os.path.splitext(OUTPUT_EXCEL)[0]}_{title}.csv"
+            # utf-8-sig so Excel detects the encoding when the file is opened directly
+            with open(out_path, "w", newline="", encoding="utf-8-sig") as f:
+                writer = csv.writer(f)
+                writer.writerow(header)
+                writer.writerows(rows)
+            written.append(out_path)
+        return written
 
-    # Write result to main sheet
-    sheet_main.append([
-        parent_name,
-        ",".join(gts_list) if gts_list else "-",
-        ",".join(tsq_list) if tsq_list else "-"
-    ])
+    # Write-only workbook: rows are streamed, not kept as cells
+    workbook = Workbook(write_only=True)
+    for title, header, rows in sheets:
+        sheet = workbook.create_sheet(title)
+        sheet.append(header)
+        for row in rows:
+            sheet.append(row)
+    workbook.save(OUTPUT_EXCEL)
+    return [OUTPUT_EXCEL]
 
 
 # ---------- MAIN EXECUTION ----------
 def main():
     print("🔍 Scanning directory for .gts and .tsq files...")
-    for root_dir, _, files in os.walk(BASE_PATH):
-        for file in files:
-            if file.endswith(".gts") or file.endswith(".tsq"):
-                file_path = os.path.join(root_dir, file)
-                filename = os.path.splitext(file)[0]
-                process_file(file_path, filename)
+    root_files = []
+    for entry in _iter_files(BASE_PATH):
+        if entry.name.endswith((".gts", ".tsq")):
+            root_files.append((entry.path, _stem(entry.name)))
 
-    workbook.save(OUTPUT_EXCEL)
-    print(f"✅ Report generated successfully: {OUTPUT_EXCEL}")
+    # Parse all files across processes; resolving and report rows stay here, in walk order
+    paths = [file_path for file_path, _ in root_files]
+    workers = min(os.cpu_count() or 1, len(paths) or 1)
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        chunksize = max(1, len(paths) // (workers * 4))
+        _parsed.update(zip(paths, ex.map(_parse_file, paths, chunksize=chunksize)))
+
+    for file_path, filename in root_files:
+        # Already reported as a sub-gts of an earlier root; just drop its read-ahead result
+        if _file_key(file_path) in completed_files:
+            _parsed.pop(file_path, None)
+            continue
+        process_file(file_path, filename)
+
+    written = save_report()
+    print(f"✅ Report generated successfully: {', '.join(written)}")
 
 
 if __name__ == "__main__":
@@ -139,7 +354,7 @@ def resolve_lkpath(base_path, lkpath):
     # Try each segment as candidate root under base_path
     for i, seg in enumerate(parts):
         candidate_root = os.path.join(base_path, seg)
-        if os.path.exists(candidate_root):
+        if _exists(base_path, seg):
             # We found a starting segment at index i.
             # Build the full path from this found point to the end of parts
             remaining = parts[i+1:]  # parts after the found segment
@@ -149,10 +364,12 @@ def resolve_lkpath(base_path, lkpath):
             # Check for .gts or .tsq files (file names expected to be the final segment base name)
             gts_path = final_path_no_ext + ".gts"
             tsq_path = final_path_no_ext + ".tsq"
+            final_dir = os.path.join(candidate_root, *remaining[:-1]) if remaining else base_path
+            final_name = parts[-1]
 
-            if os.path.exists(gts_path):
+            if _exists(final_dir, final_name + ".gts"):
                 return (gts_path, "gts", None)
-            if os.path.exists(tsq_path):
+            if _exists(final_dir, final_name + ".tsq"):
                 return (tsq_path, "tsq", None)
 
             # If neither file exists, this is an error: final candidate missing the extension